@@ -1,4 +1,6 @@
 import os
+import errno
+import math
 import random
 import json
 import time
@@ -10,6 +12,11 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import logging
 import heapq
+import itertools
+import operator
+import sqlite3
+import struct
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     from PIL import Image, ImageTk
@@ -19,10 +26,23 @@ except ImportError:
     EXIF_AVAILABLE = False
     PIL_AVAILABLE = False
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
 # File type and path constants
 PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff')
-LOG_FILE = "viewed_photos.json"
-CACHE_FILE = "photo_metadata.json"
+# Lower and upper case forms, so the common cases match without lower()
+PHOTO_SUFFIXES = PHOTO_EXTENSIONS + tuple(ext.upper() for ext in PHOTO_EXTENSIONS)
+LOG_FILE = "viewed_photos.db"
+LEGACY_LOG_FILE = "viewed_photos.json"
+CACHE_FILE = "photo_metadata.db"
+LEGACY_CACHE_FILE = "photo_metadata.json"
+FAST_EXIF_EXTENSIONS = ('.jpg', '.jpeg')  # Formats handled by the header scanner
+EXIF_SCAN_BYTES = 64 * 1024  # EXIF must sit in the first APP1 segment, well within this
+EXIF_DATE_TAGS = (0x9003, 0x9004, 0x0132)  # DateTimeOriginal, Digitized, DateTime
 
 # GUI Configuration
 BG_COLOR = "#c1b1f2"
@@ -31,8 +51,17 @@ BG_COLOR = "#c1b1f2"
 MAX_PHOTO_COUNT = 10000
 MIN_PHOTO_COUNT = 1
 MAX_SWITCHES_PER_DAY = 100
-CACHE_SAVE_INTERVAL = 5000  # Save cache every N photos scanned
+SCAN_PROGRESS_INTERVAL = 5000  # Log scan progress every N photos scanned
+CACHE_FLUSH_INTERVAL = 500  # Write cache entries to disk every N updates
+CACHE_FAST_PATH_COVERAGE = 0.99  # Select from cached dates alone when this share is cached
+SCAN_WORKERS = 16  # Threads reading photo metadata in parallel
+MOVE_WORKERS = 8  # Threads moving photos; kept low for single-spindle drives
 THREAD_JOIN_TIMEOUT = 2.0
+SCHEDULE_REFRESH_MS = 5 * 60 * 1000  # Refresh next-switch label and timer every 5 minutes
+NUMPY_SELECT_MIN = 10000  # Pick with numpy above this many candidates
+CANCEL_CHECK_INTERVAL = 256  # Enumeration loops poll for cancellation every N items
+
+_END = object()  # Sentinel for exhausted iterators
 
 
 class TextHandler(logging.Handler):
@@ -51,17 +80,174 @@ class TextHandler(logging.Handler):
         self.text_widget.after(0, append)
 
 
+class ViewedSet:
+    """Set of viewed photo names stored in a sqlite table.
+    
+    Each change is written as its own statement, so recording a switch no
+    longer rewrites the whole history. Safe to use from worker threads.
+    """
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # WAL keeps each commit atomic; NORMAL skips the fsync per commit
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS viewed (name TEXT PRIMARY KEY)")
+    
+    def __contains__(self, name):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM viewed WHERE name = ?", (name,)).fetchone() is not None
+    
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM viewed").fetchone()[0]
+    
+    def add(self, name):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO viewed (name) VALUES (?)", (name,))
+    
+    def update(self, names):
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO viewed (name) VALUES (?)",
+                                  ((name,) for name in names))
+    
+    def discard(self, name):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM viewed WHERE name = ?", (name,))
+    
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM viewed")
+    
+    def copy(self):
+        """Return the viewed names as a plain in-memory set"""
+        with self.lock:
+            return {name for (name,) in self.conn.execute("SELECT name FROM viewed")}
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class MetadataCache:
+    """Photo metadata (date, orientation) stored in a sqlite table.
+    
+    Rows are keyed on file name and only trusted while the file's size and
+    mtime_ns still match. Updates are buffered in memory and written in one
+    batch by flush(). Safe to use from worker threads.
+    """
+    FIELDS = ("size", "mtime_ns", "date", "orientation")
+    
+    def __init__(self, db_path):
+        self.lock = threading.Lock()
+        self.pending = {}  # name -> row not yet written
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Batches commit atomically through the WAL without an fsync each
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, "
+                              "size INTEGER, mtime_ns INTEGER, date REAL, orientation TEXT)")
+    
+    def _row(self, name):
+        """Return the row for name as a dict, or None. Caller holds the lock."""
+        if name in self.pending:
+            return self.pending[name]
+        row = self.conn.execute("SELECT size, mtime_ns, date, orientation FROM metadata WHERE name = ?",
+                                (name,)).fetchone()
+        return dict(zip(self.FIELDS, row)) if row else None
+    
+    def lookup(self, name, size, mtime_ns):
+        """Return the row for name if the file is unchanged, else None.
+        
+        Rows imported without size/mtime are stamped with the given values.
+        """
+        with self.lock:
+            row = self._row(name)
+            if row is None:
+                return None
+            if row["size"] is None:
+                row["size"] = size
+                row["mtime_ns"] = mtime_ns
+                self.pending[name] = row
+            elif row["size"] != size or row["mtime_ns"] != mtime_ns:
+                return None
+            return row
+    
+    def update(self, name, size, mtime_ns, **values):
+        """Buffer new values for name and return the number of pending rows"""
+        with self.lock:
+            row = self._row(name)
+            if row is None or row["size"] != size or row["mtime_ns"] != mtime_ns:
+                row = {"size": size, "mtime_ns": mtime_ns, "date": None, "orientation": None}
+            row.update(values)
+            self.pending[name] = row
+            return len(self.pending)
+    
+    def import_rows(self, rows):
+        """Insert {name: row} entries that are not already stored"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO metadata VALUES (?, ?, ?, ?, ?)",
+                ((name, *(row.get(field) for field in self.FIELDS)) for name, row in rows.items()))
+    
+    def snapshot(self):
+        """Return {name: (size, mtime_ns, date, orientation)} for every dated row.
+        
+        Rows are not validated; callers compare size and mtime_ns themselves.
+        """
+        with self.lock:
+            rows = {name: (size, mtime_ns, date, orientation)
+                    for name, size, mtime_ns, date, orientation in self.conn.execute(
+                        "SELECT name, size, mtime_ns, date, orientation FROM metadata "
+                        "WHERE date IS NOT NULL")}
+            for name, row in self.pending.items():
+                if row["date"] is not None:
+                    rows[name] = tuple(row[field] for field in self.FIELDS)
+            return rows
+    
+    def flush(self):
+        with self.lock:
+            if not self.pending:
+                return
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?)",
+                    ((name, *(row[field] for field in self.FIELDS)) for name, row in self.pending.items()))
+            self.pending.clear()
+    
+    def prune(self, valid_names):
+        """Delete rows whose name is not in valid_names. Returns rows removed."""
+        self.flush()
+        with self.lock, self.conn:
+            self.conn.execute("CREATE TEMP TABLE valid (name TEXT PRIMARY KEY)")
+            try:
+                self.conn.executemany("INSERT OR IGNORE INTO valid VALUES (?)",
+                                      ((name,) for name in valid_names))
+                return self.conn.execute(
+                    "DELETE FROM metadata WHERE name NOT IN (SELECT name FROM valid)").rowcount
+            finally:
+                self.conn.execute("DROP TABLE valid")
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
 class PhotoScheduler:
     def __init__(self):
         self.setup_logging()
         self.setup_gui()
         self.viewed_photos = self.load_viewed_photos()
         self.metadata_cache = self.load_metadata_cache()
-        self.cache_dirty = False
         self.viewed_photos_lock = threading.Lock()
         self.operation_lock = threading.Lock()
         self.operation_cancelled = threading.Event()
         self.current_thread = None
+        self.no_link_dirs = set()  # Destination dirs whose filesystem lacks hard links
+        self.switch_timer = None  # Tk after-id of the one-shot switch timer
+        self.switch_timer_target = None  # Datetime the timer is armed for
         
         # Setup signal handlers for graceful shutdown
         self._setup_signal_handlers()
@@ -72,7 +258,6 @@ class PhotoScheduler:
         # Prune stale cache entries on startup
         self.prune_metadata_cache()
         
-        self.update_next_switch()
         self.periodic_update()
     
     def _setup_signal_handlers(self):
@@ -103,30 +288,49 @@ class PhotoScheduler:
     
     def load_metadata_cache(self):
         try:
-            if Path(CACHE_FILE).exists():
-                with open(CACHE_FILE, 'r') as f:
-                    cache = json.load(f)
-                    # Handle backward compatibility with old format
-                    if cache and isinstance(next(iter(cache.values()), None), (int, float)):
-                        # Old format: {"photo.jpg": timestamp}
-                        self.logger.info("Converting old cache format to new format")
-                        cache = {k: {"date": v, "orientation": None} for k, v in cache.items()}
-                        self.cache_dirty = True
-                    return cache
-        except (json.JSONDecodeError, IOError, OSError) as e:
+            cache = MetadataCache(CACHE_FILE)
+        except sqlite3.Error as e:
             self.logger.error(f"Error loading metadata cache: {e}")
-        return {}
+            return MetadataCache(":memory:")
+        
+        # One-time import of the old JSON cache
+        if Path(LEGACY_CACHE_FILE).exists():
+            try:
+                legacy = self._read_legacy_metadata_cache()
+                if legacy is not None:
+                    cache.import_rows(legacy)
+                    Path(LEGACY_CACHE_FILE).rename(LEGACY_CACHE_FILE + ".bak")
+                    self.logger.info(f"Imported metadata cache from {LEGACY_CACHE_FILE}")
+            except (json.JSONDecodeError, IOError, OSError, sqlite3.Error) as e:
+                self.logger.error(f"Error importing metadata cache: {e}")
+        return cache
+    
+    def _read_legacy_metadata_cache(self):
+        """Read the old JSON cache into {name: row}, or None if it isn't a dict"""
+        with open(LEGACY_CACHE_FILE, 'r') as f:
+            cache = json.load(f)
+        if not isinstance(cache, dict):
+            self.logger.error(f"Ignoring {LEGACY_CACHE_FILE}: expected a JSON object")
+            return None
+        # Handle backward compatibility with old format
+        if cache and isinstance(next(iter(cache.values()), None), (int, float)):
+            # Old format: {"photo.jpg": timestamp}
+            cache = {k: {"date": v, "orientation": None} for k, v in cache.items()}
+        return cache
     
     def save_metadata_cache(self):
-        if not self.cache_dirty:
-            return
         try:
-            with open(CACHE_FILE, 'w') as f:
-                json.dump(self.metadata_cache, f)
-            self.cache_dirty = False
-        except (IOError, OSError) as e:
+            self.metadata_cache.flush()
+        except sqlite3.Error as e:
             self.logger.error(f"Error saving metadata cache: {e}")
     
+    def _update_cache_entry(self, filename, stat_result, **values):
+        """Store metadata for filename, saving every CACHE_FLUSH_INTERVAL updates"""
+        pending = self.metadata_cache.update(filename, stat_result.st_size,
+                                             stat_result.st_mtime_ns, **values)
+        if pending >= CACHE_FLUSH_INTERVAL:
+            self.save_metadata_cache()
+    
     def prune_metadata_cache(self):
         """Remove cache entries for photos no longer in Library or Gallery.
         
@@ -143,49 +347,63 @@ class PhotoScheduler:
                 valid_files.update(p.name for p in self.iter_photos(folder))
         
         # Remove cache entries that no longer exist
-        before = len(self.metadata_cache)
-        self.metadata_cache = {k: v for k, v in self.metadata_cache.items() if k in valid_files}
-        removed = before - len(self.metadata_cache)
+        try:
+            self.metadata_cache.prune(valid_files)
+        except sqlite3.Error as e:
+            self.logger.error(f"Error pruning metadata cache: {e}")
         
-        if removed > 0:
-            self.cache_dirty = True
-            self.save_metadata_cache()
+    def get_photo_date(self, photo_path, entry=None):
+        """Get photo date with caching.
         
-    def get_photo_date(self, photo_path):
-        """Get photo date with caching"""
+        If the os.DirEntry for the photo is passed, its cached stat result
+        is used both to validate the cache and for the timestamp fallback.
+        """
         filename = photo_path.name
+        try:
+            stat_result = entry.stat() if entry is not None else photo_path.stat()
+        except (IOError, OSError) as e:
+            self.logger.warning(f"Error getting date for {photo_path}: {e}")
+            return time.time()
         
         # Check cache first
-        if filename in self.metadata_cache:
-            cached_date = self.metadata_cache[filename].get("date")
-            if cached_date is not None:
-                return cached_date
+        cached = self.metadata_cache.lookup(filename, stat_result.st_size, stat_result.st_mtime_ns)
+        if cached and cached["date"] is not None:
+            return cached["date"]
         
         # Calculate date using fallback hierarchy
-        date = self._calculate_photo_date(photo_path)
+        date = self._calculate_photo_date(photo_path, stat_result)
         
         # Update cache
-        if filename not in self.metadata_cache:
-            self.metadata_cache[filename] = {}
-        self.metadata_cache[filename]["date"] = date
-        self.cache_dirty = True
+        self._update_cache_entry(filename, stat_result, date=date)
         return date
     
-    def _calculate_photo_date(self, photo_path):
+    def _calculate_photo_date(self, photo_path, stat_result=None):
         """Calculate photo date using fallback hierarchy"""
         try:
+            if photo_path.suffix.lower() in FAST_EXIF_EXTENSIONS:
+                try:
+                    exif_date = self._read_exif_datetime(photo_path)
+                    date = self._parse_exif_datetime(exif_date) if exif_date else None
+                    if date is not None:
+                        return date
+                except (IOError, OSError, ValueError):
+                    pass
+            
+            # Pillow covers other formats and JPEGs the header scanner can't read
             if EXIF_AVAILABLE:
                 try:
                     with Image.open(photo_path) as img:
                         exif = img.getexif()
                         if exif:
-                            for tag in [36867, 36868, 306]:  # DateTimeOriginal, Digitized, DateTime
+                            for tag in EXIF_DATE_TAGS:
                                 if tag in exif and exif[tag]:
-                                    return datetime.strptime(exif[tag], '%Y:%m:%d %H:%M:%S').timestamp()
+                                    date = self._parse_exif_datetime(exif[tag])
+                                    if date is not None:
+                                        return date
                 except (IOError, OSError, ValueError):
                     pass
             
-            stat = photo_path.stat()
+            stat = stat_result if stat_result is not None else photo_path.stat()
             if hasattr(stat, 'st_birthtime'):
                 return stat.st_birthtime
             elif os.name == 'nt':
@@ -195,24 +413,122 @@ class PhotoScheduler:
             self.logger.warning(f"Error getting date for {photo_path}: {e}")
             return time.time()
     
-    def get_photo_orientation(self, photo_path):
+    def _parse_exif_datetime(self, value):
+        """Convert an EXIF 'YYYY:MM:DD HH:MM:SS' string to a timestamp.
+        
+        The layout is fixed, so slicing it is much cheaper than strptime.
+        Returns None for malformed values (e.g. '0000:00:00 00:00:00').
+        """
+        if (len(value) != 19 or value[4] != ':' or value[7] != ':' or value[10] != ' '
+                or value[13] != ':' or value[16] != ':'):
+            return None
+        try:
+            return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                            int(value[11:13]), int(value[14:16]), int(value[17:19])).timestamp()
+        except ValueError:
+            return None
+    
+    def _read_exif_datetime(self, photo_path):
+        """Read the EXIF date string from a JPEG without decoding the image.
+        
+        Scans the JPEG markers for the APP1 Exif segment and walks only IFD0
+        and the Exif sub-IFD looking for the date tags. Returns the first
+        non-empty date string in EXIF_DATE_TAGS priority order, or None.
+        """
+        with open(photo_path, 'rb') as f:
+            data = f.read(EXIF_SCAN_BYTES)
+        
+        if data[:2] != b'\xff\xd8':
+            return None
+        
+        # Locate the APP1 Exif segment
+        pos = 2
+        tiff = None
+        while pos + 4 <= len(data):
+            if data[pos] != 0xFF:
+                return None
+            marker = data[pos + 1]
+            if marker == 0xFF:
+                pos += 1  # Fill byte
+                continue
+            if marker == 0xDA or marker == 0xD9:
+                return None  # Start of scan / end of image - no EXIF
+            length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+            if marker == 0xE1 and data[pos + 4:pos + 10] == b'Exif\x00\x00':
+                tiff = data[pos + 10:pos + 2 + length]
+                break
+            pos += 2 + length
+        
+        if tiff is None or len(tiff) < 8:
+            return None
+        
+        if tiff[:2] == b'II':
+            endian = '<'
+        elif tiff[:2] == b'MM':
+            endian = '>'
+        else:
+            return None
+        
+        def read_ifd(offset, wanted):
+            """Return {tag: (type, count, value_bytes)} for wanted tags in one IFD"""
+            found = {}
+            if offset + 2 > len(tiff):
+                return found
+            entry_count = struct.unpack(endian + 'H', tiff[offset:offset + 2])[0]
+            for i in range(entry_count):
+                start = offset + 2 + i * 12
+                if start + 12 > len(tiff):
+                    break
+                tag, typ, cnt = struct.unpack(endian + 'HHI', tiff[start:start + 8])
+                if tag in wanted:
+                    found[tag] = (typ, cnt, tiff[start + 8:start + 12])
+            return found
+        
+        def ascii_value(entry):
+            typ, cnt, value = entry
+            if typ != 2:  # ASCII
+                return None
+            if cnt > 4:
+                value_offset = struct.unpack(endian + 'I', value)[0]
+                value = tiff[value_offset:value_offset + cnt]
+            text = value[:cnt].split(b'\x00', 1)[0].decode('ascii', 'ignore').strip()
+            return text or None
+        
+        ifd0_offset = struct.unpack(endian + 'I', tiff[4:8])[0]
+        ifd0 = read_ifd(ifd0_offset, {0x0132, 0x8769})
+        
+        values = {}
+        if 0x8769 in ifd0:  # Exif sub-IFD pointer
+            exif_offset = struct.unpack(endian + 'I', ifd0[0x8769][2])[0]
+            for tag, entry in read_ifd(exif_offset, {0x9003, 0x9004}).items():
+                values[tag] = ascii_value(entry)
+        if 0x0132 in ifd0:
+            values[0x0132] = ascii_value(ifd0[0x0132])
+        
+        for tag in EXIF_DATE_TAGS:
+            if values.get(tag):
+                return values[tag]
+        return None
+    
+    def get_photo_orientation(self, photo_path, entry=None):
         """Get photo orientation (portrait or landscape) with caching"""
         filename = photo_path.name
+        try:
+            stat_result = entry.stat() if entry is not None else photo_path.stat()
+        except (IOError, OSError) as e:
+            self.logger.warning(f"Error getting orientation for {photo_path}: {e}")
+            return None
         
         # Check cache first
-        if filename in self.metadata_cache:
-            cached_orientation = self.metadata_cache[filename].get("orientation")
-            if cached_orientation is not None:
-                return cached_orientation
+        cached = self.metadata_cache.lookup(filename, stat_result.st_size, stat_result.st_mtime_ns)
+        if cached and cached["orientation"] is not None:
+            return cached["orientation"]
         
         # Calculate orientation
         orientation = self._calculate_photo_orientation(photo_path)
         
         # Update cache
-        if filename not in self.metadata_cache:
-            self.metadata_cache[filename] = {}
-        self.metadata_cache[filename]["orientation"] = orientation
-        self.cache_dirty = True
+        self._update_cache_entry(filename, stat_result, orientation=orientation)
         return orientation
     
     def _calculate_photo_orientation(self, photo_path):
@@ -404,6 +720,8 @@ class PhotoScheduler:
         ttk.Button(frame, text="...", width=3, command=lambda: self.browse_path(variable)).pack(side="left", padx=(5,0))
     
     def update_gallery_path(self, *args):
+        # Resolved paths are recomputed by the next validate_paths call
+        self._resolved_paths = None
         library = self.library_path.get()
         if library:
             self.gallery_path_display.set(str(Path(library) / "Gallery"))
@@ -465,29 +783,36 @@ class PhotoScheduler:
             return False
     
     def validate_paths(self):
-        library = self.get_library_path().resolve()
-        gallery = self.get_gallery_path().resolve()
+        # Resolve once per library path rather than on every operation
+        if self._resolved_paths is None:
+            self._resolved_paths = (self.get_library_path().resolve(),
+                                    self.get_gallery_path().resolve())
+        library, gallery = self._resolved_paths
         if library == gallery:
             raise ValueError("Gallery path cannot be the same as library path")
         return True
             
     def load_viewed_photos(self):
         try:
-            if Path(LOG_FILE).exists():
-                with open(LOG_FILE, 'r') as f:
-                    data = json.load(f)
-                    return set(data) if isinstance(data, list) else set()
-        except (json.JSONDecodeError, IOError, OSError) as e:
+            viewed = ViewedSet(LOG_FILE)
+        except sqlite3.Error as e:
             self.logger.error(f"Error loading viewed photos: {e}")
-        return set()
-    
-    def save_viewed_photos(self):
-        try:
-            with self.viewed_photos_lock:
-                with open(LOG_FILE, 'w') as f:
-                    json.dump(list(self.viewed_photos), f)
-        except (IOError, OSError) as e:
-            self.logger.error(f"Error saving viewed photos: {e}")
+            return ViewedSet(":memory:")
+        
+        # One-time import of the old JSON history
+        if Path(LEGACY_LOG_FILE).exists():
+            try:
+                with open(LEGACY_LOG_FILE, 'r') as f:
+                    data = json.load(f)
+                if isinstance(data, list):
+                    viewed.update(data)
+                    Path(LEGACY_LOG_FILE).rename(LEGACY_LOG_FILE + ".bak")
+                    self.logger.info(f"Imported {len(data)} viewed photos from {LEGACY_LOG_FILE}")
+                else:
+                    self.logger.error(f"Ignoring {LEGACY_LOG_FILE}: expected a list of filenames")
+            except (json.JSONDecodeError, IOError, OSError, sqlite3.Error) as e:
+                self.logger.error(f"Error importing viewed photos: {e}")
+        return viewed
             
     def get_switch_times(self):
         try:
@@ -517,65 +842,92 @@ class PhotoScheduler:
             return []
     
     def update_next_switch(self):
+        """Update the next-switch label and arm a one-shot timer for that switch"""
         switch_times = self.get_switch_times()
         if not switch_times:
             self.next_switch.set("No switches scheduled")
+            self.arm_switch_timer(None)
             return
         
         now = datetime.now()
         for switch_time in switch_times:
             if switch_time > now:
                 self.next_switch.set(switch_time.strftime("%H:%M"))
+                self.arm_switch_timer(switch_time)
                 return
         
         self.next_switch.set(f"{switch_times[0].strftime('%H:%M')} (tomorrow)")
+        self.arm_switch_timer(switch_times[0] + timedelta(days=1))
     
-    def check_scheduled_switches(self):
-        if self.operation_lock.locked():
-            return
-            
-        switch_times = self.get_switch_times()
-        if not switch_times:
-            return
-        
+    def arm_switch_timer(self, target):
+        """Schedule trigger_scheduled_switch to run once at target (None cancels)"""
         now = datetime.now()
-        current_time = now.replace(second=0, microsecond=0)
-        
-        for switch_time in switch_times:
-            if switch_time.replace(second=0, microsecond=0) == current_time:
-                self.logger.info(f"Scheduled switch at {switch_time.strftime('%H:%M')}")
-                self.switch_photos_async()
-                break
+        if self.switch_timer is not None:
+            if self.switch_timer_target <= now:
+                return  # Already due - let it fire, it re-arms itself
+            self.root.after_cancel(self.switch_timer)
+            self.switch_timer = None
+        
+        self.switch_timer_target = target
+        if target is not None:
+            delay_ms = max(0, math.ceil((target - now).total_seconds() * 1000))
+            self.switch_timer = self.root.after(delay_ms, self.trigger_scheduled_switch)
+    
+    def trigger_scheduled_switch(self):
+        self.switch_timer = None
+        target = self.switch_timer_target
+        
+        # Timers can fire a little early - re-arming picks the same target again
+        if datetime.now() >= target and not self.operation_lock.locked():
+            self.logger.info(f"Scheduled switch at {target.strftime('%H:%M')}")
+            self.switch_photos_async()
+        self.update_next_switch()
     
     def iter_photos(self, directory):
         """Iterate over photo files in directory with proper error handling"""
+        for entry in self.iter_photo_entries(directory):
+            yield Path(entry.path)
+    
+    def iter_photo_entries(self, directory):
+        """Iterate over photo os.DirEntry objects in directory.
+        
+        Uses os.scandir so the file type comes from the directory listing
+        itself instead of a stat call per file. Entries also cache their
+        stat result, which callers can reuse for date fallbacks.
+        """
         try:
             directory_path = Path(directory)
             if not directory_path.exists():
                 self.logger.warning(f"Directory does not exist: {directory_path}")
                 return
             
+            # Read the listing up front - callers may move files while iterating
             try:
-                entries = list(directory_path.iterdir())
+                with os.scandir(directory_path) as scanner:
+                    entries = list(scanner)
             except PermissionError as e:
                 self.logger.error(f"Permission denied accessing {directory}: {e}")
                 return
-                
-            for file_path in entries:
+            
+            for entry in entries:
+                name = entry.name
+                # Only mixed-case names (e.g. ".Jpg") and non-photos fall back to lower()
+                if not (name.endswith(PHOTO_SUFFIXES) or name.lower().endswith(PHOTO_EXTENSIONS)):
+                    continue
                 try:
-                    if file_path.is_file() and file_path.suffix.lower() in PHOTO_EXTENSIONS:
-                        yield file_path
+                    if entry.is_file():
+                        yield entry
                 except (PermissionError, OSError) as e:
-                    self.logger.warning(f"Error accessing {file_path}: {e}")
+                    self.logger.warning(f"Error accessing {entry.path}: {e}")
                     continue
         except (IOError, OSError) as e:
             self.logger.error(f"Error reading directory {directory}: {e}")
     
-    def _filter_by_orientation(self, photo, orientation_filter):
+    def _filter_by_orientation(self, photo, orientation_filter, entry=None):
         """Check if photo matches orientation filter"""
         if orientation_filter == "Both":
             return True
-        photo_orientation = self.get_photo_orientation(photo)
+        photo_orientation = self.get_photo_orientation(photo, entry)
         if photo_orientation is None:
             # Can't determine orientation, include it
             return True
@@ -585,25 +937,36 @@ class PhotoScheduler:
         """
         Reservoir sampling: select k random items from an iterator of unknown length.
         Memory efficient - only stores k items at a time.
+        
+        Uses Algorithm L, which draws how many items to skip before the next
+        replacement instead of a random number for every item.
         """
-        reservoir = []
-        for i, item in enumerate(iterator):
-            if self.operation_cancelled.is_set():
+        iterator = iter(iterator)
+        reservoir = list(itertools.islice(iterator, k))
+        if len(reservoir) < k:
+            return reservoir
+        
+        # Draw from 1 - random(), which lies in (0, 1], so log() never sees zero
+        w = math.exp(math.log(1.0 - random.random()) / k)
+        while not self.operation_cancelled.is_set():
+            skip = math.floor(math.log(1.0 - random.random()) / math.log(1.0 - w))
+            item = next(itertools.islice(iterator, skip, None), _END)
+            if item is _END:
                 break
-            if i < k:
-                reservoir.append(item)
-            else:
-                # Randomly replace elements with decreasing probability
-                j = random.randint(0, i)
-                if j < k:
-                    reservoir[j] = item
+            reservoir[random.randrange(k)] = item
+            w *= math.exp(math.log(1.0 - random.random()) / k)
         return reservoir
     
-    def select_photos(self, library_path, count, mode, orientation_filter="Both"):
+    def select_photos(self, library_path, count, mode, orientation_filter="Both", scan_result=None):
         """Select photos from library based on mode and filters.
         
         Returns whatever unviewed photos it can find (may be less than requested).
         Caller is responsible for handling consolidation if not enough photos.
+        
+        Args:
+            scan_result: Optional dict filled in by Newest/Oldest scans so a
+                         re-selection after a history reset can reuse it
+                         (see _reselect_by_date).
         """
         count = max(MIN_PHOTO_COUNT, min(count, MAX_PHOTO_COUNT))
         library_path = Path(library_path)
@@ -614,13 +977,18 @@ class PhotoScheduler:
         with self.viewed_photos_lock:
             viewed_snapshot = self.viewed_photos.copy()
         
+        # The orientation filter may open each photo, so then check every item
+        check_interval = CANCEL_CHECK_INTERVAL if orientation_filter == "Both" else 1
+        
         def unviewed_photos():
-            for photo in self.iter_photos(library_path):
-                if self.operation_cancelled.is_set():
+            for i, entry in enumerate(self.iter_photo_entries(library_path)):
+                if i % check_interval == 0 and self.operation_cancelled.is_set():
                     return
                 # No lock needed - checking against immutable snapshot
-                if photo.name not in viewed_snapshot:
-                    if self._filter_by_orientation(photo, orientation_filter):
+                if entry.name not in viewed_snapshot:
+                    photo = Path(entry.path)
+                    # Pass the entry so the cache check reuses its stat result
+                    if self._filter_by_orientation(photo, orientation_filter, entry):
                         yield photo
         
         if mode == "Random":
@@ -628,9 +996,11 @@ class PhotoScheduler:
             return self._reservoir_sample(unviewed_photos(), count)
         else:
             # Newest/Oldest mode - need to scan with dates
-            return self._select_by_date(library_path, count, mode, orientation_filter, viewed_snapshot)
+            return self._select_by_date(library_path, count, mode, orientation_filter,
+                                        viewed_snapshot, scan_result)
     
-    def _select_by_date(self, library_path, count, mode, orientation_filter, viewed_snapshot):
+    def _select_by_date(self, library_path, count, mode, orientation_filter, viewed_snapshot,
+                        scan_result=None):
         """Select photos sorted by date (newest or oldest).
         
         Returns whatever unviewed photos it can find (may be less than requested).
@@ -639,32 +1009,144 @@ class PhotoScheduler:
         Args:
             viewed_snapshot: A snapshot of viewed_photos to check against, avoiding
                             race conditions during iteration.
+            scan_result: Optional dict that receives the dated unviewed photos
+                         ("dated") and the viewed photos skipped ("viewed").
         """
         self.logger.info(f"Selecting {count} {mode.lower()} photos (scanning library)...")
-        processed = [0]  # Use list for closure modification
         
-        def unviewed_photos_with_date():
-            for photo in self.iter_photos(library_path):
-                if self.operation_cancelled.is_set():
-                    return
-                # No lock needed - checking against immutable snapshot
-                if photo.name in viewed_snapshot:
-                    continue
-                if not self._filter_by_orientation(photo, orientation_filter):
-                    continue
-                processed[0] += 1
-                if processed[0] % CACHE_SAVE_INTERVAL == 0:
-                    self.logger.info(f"Scanned {processed[0]} photos...")
-                    self.save_metadata_cache()
-                yield (self.get_photo_date(photo), photo)
+        unviewed = []
+        viewed = []
+        for entry in self.iter_photo_entries(library_path):
+            # No lock needed - checking against immutable snapshot
+            if entry.name in viewed_snapshot:
+                viewed.append((Path(entry.path), entry))
+            else:
+                unviewed.append((Path(entry.path), entry))
+        if self.operation_cancelled.is_set():
+            return []
         
-        heap_func = heapq.nlargest if mode == "Newest" else heapq.nsmallest
-        selected = [photo for _, photo in heap_func(count, unviewed_photos_with_date())]
+        photos_with_date = self._date_photos_from_cache(unviewed, orientation_filter)
+        if photos_with_date is None:
+            photos_with_date = self._date_photos(unviewed, orientation_filter)
+        if self.operation_cancelled.is_set():
+            return []
         
-        self.logger.info(f"Scan complete: processed {processed[0]} photos")
-        self.save_metadata_cache()
+        if scan_result is not None:
+            scan_result["dated"] = photos_with_date
+            scan_result["viewed"] = viewed
         
-        return selected
+        return self._pick_by_date(photos_with_date, count, mode)
+    
+    def _reselect_by_date(self, scan_result, new_photos, count, mode, orientation_filter):
+        """Re-select by date after a history reset without rescanning the library.
+        
+        The earlier scan already dated every unviewed Library photo, so only
+        the photos it skipped as viewed and those just consolidated from the
+        Gallery (new_photos, as (path, entry) pairs) still need dates.
+        """
+        self.logger.info(f"Selecting {count} {mode.lower()} photos (reusing previous scan)...")
+        to_date = scan_result["viewed"] + new_photos
+        newly_dated = self._date_photos_from_cache(to_date, orientation_filter)
+        if newly_dated is None:
+            newly_dated = self._date_photos(to_date, orientation_filter)
+        photos_with_date = scan_result["dated"] + newly_dated
+        if self.operation_cancelled.is_set():
+            return []
+        return self._pick_by_date(photos_with_date, count, mode)
+    
+    def _date_photos_from_cache(self, photos, orientation_filter):
+        """Date (path, entry) pairs from the cache alone when it is nearly complete.
+        
+        Cached rows are checked against the entry's stat (size and mtime_ns)
+        but no file is opened, so on a warm cache selection needs no EXIF or
+        image reads. Uncached or changed photos go through _date_photos.
+        Returns None if fewer than CACHE_FAST_PATH_COVERAGE are cached.
+        """
+        try:
+            cached = self.metadata_cache.snapshot()
+        except sqlite3.Error as e:
+            self.logger.error(f"Error reading metadata cache: {e}")
+            return None
+        
+        check_orientation = orientation_filter != "Both" and EXIF_AVAILABLE
+        wanted = orientation_filter.lower()
+        photos_with_date = []
+        uncached = []
+        for photo, entry in photos:
+            size, mtime_ns, date, orientation = cached.get(photo.name, (None, None, None, None))
+            if date is not None:
+                try:
+                    stat_result = entry.stat() if entry is not None else photo.stat()
+                    if stat_result.st_size != size or stat_result.st_mtime_ns != mtime_ns:
+                        date = None  # File changed (or legacy row) - re-date it
+                except (IOError, OSError):
+                    date = None  # Let _date_photos report the error
+            if date is None or (check_orientation and orientation is None):
+                uncached.append((photo, entry))
+            elif not check_orientation or orientation == wanted:
+                photos_with_date.append((date, photo))
+        
+        if len(uncached) > len(photos) * (1 - CACHE_FAST_PATH_COVERAGE):
+            return None
+        
+        self.logger.info(f"Using cached dates ({len(uncached)} photos not cached)")
+        if uncached:
+            photos_with_date += self._date_photos(uncached, orientation_filter)
+        return photos_with_date
+    
+    def _date_photos(self, photos, orientation_filter):
+        """Date (path, entry) pairs that pass the orientation filter.
+        
+        Returns a list of (date, path) tuples. Entry may be None.
+        """
+        def dated_if_matches(item):
+            photo, entry = item
+            if not self._filter_by_orientation(photo, orientation_filter, entry):
+                return None
+            return (self.get_photo_date(photo, entry), photo)
+        
+        # Metadata reads are I/O bound, so overlap them across threads
+        processed = 0
+        photos_with_date = []
+        with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+            for i, dated in enumerate(executor.map(dated_if_matches, photos)):
+                if i % CANCEL_CHECK_INTERVAL == 0 and self.operation_cancelled.is_set():
+                    # Drop the queued futures so leaving the block only waits
+                    # for the reads already running
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+                if dated is None:
+                    continue
+                photos_with_date.append(dated)
+                processed += 1
+                if processed % SCAN_PROGRESS_INTERVAL == 0:
+                    self.logger.info(f"Scanned {processed} photos...")
+        
+        self.logger.info(f"Scan complete: processed {processed} photos")
+        self.save_metadata_cache()
+        return photos_with_date
+    
+    def _pick_by_date(self, photos_with_date, count, mode):
+        """Pick the count newest or oldest photos from (date, path) tuples"""
+        if count * 2 >= len(photos_with_date):
+            # Picking half or more - one Timsort beats heap selection
+            ordered = sorted(photos_with_date, key=operator.itemgetter(0), reverse=(mode == "Newest"))
+            return [photo for _, photo in ordered[:count]]
+        if NUMPY_AVAILABLE and NUMPY_SELECT_MIN < len(photos_with_date):
+            return self._pick_by_date_numpy(photos_with_date, count, mode)
+        heap_func = heapq.nlargest if mode == "Newest" else heapq.nsmallest
+        # Keying on the date alone means equal dates never fall through to
+        # comparing Path objects; heapq breaks ties by input order itself
+        return [photo for _, photo in heap_func(count, photos_with_date, key=operator.itemgetter(0))]
+    
+    def _pick_by_date_numpy(self, photos_with_date, count, mode):
+        """Pick with a stable np.argsort, so equal dates keep input order like heapq"""
+        dates = np.fromiter((date for date, _ in photos_with_date), dtype=float,
+                            count=len(photos_with_date))
+        if mode == "Newest":
+            dates = -dates
+        picked = np.argsort(dates, kind="stable")[:count]
+        return [photos_with_date[i][1] for i in picked]
     
     def switch_photos_async(self):
         if not self.operation_lock.acquire(blocking=False):
@@ -714,7 +1196,8 @@ class PhotoScheduler:
             mode = self.selection_mode.get()
             orientation = self.orientation_filter.get()
             self.logger.info("Selecting new photos...")
-            selected = self.select_photos(library_path, count, mode, orientation)
+            scan_result = {}
+            selected = self.select_photos(library_path, count, mode, orientation, scan_result)
             
             if self.operation_cancelled.is_set():
                 return
@@ -725,18 +1208,21 @@ class PhotoScheduler:
                 
                 # Move all Gallery photos back to Library
                 consolidated = self._consolidate_gallery_to_library(gallery_path, library_path)
-                self.logger.info(f"Consolidated {consolidated} photos from Gallery to Library")
+                self.logger.info(f"Consolidated {len(consolidated)} photos from Gallery to Library")
                 
                 # Reset view history
                 with self.viewed_photos_lock:
                     self.viewed_photos.clear()
-                self.save_viewed_photos()
                 
                 if self.operation_cancelled.is_set():
                     return
                 
                 # Re-select from the combined pool
-                selected = self.select_photos(library_path, count, mode, orientation)
+                if scan_result:
+                    # Newest/Oldest scan results can be reused instead of rescanning
+                    selected = self._reselect_by_date(scan_result, consolidated, count, mode, orientation)
+                else:
+                    selected = self.select_photos(library_path, count, mode, orientation)
                 
                 if self.operation_cancelled.is_set():
                     return
@@ -773,7 +1259,6 @@ class PhotoScheduler:
             if removed_count > 0:
                 self.logger.info(f"Moved {removed_count} old photos back to library")
             
-            self.save_viewed_photos()
             self.logger.info(f"Switch complete: {len(selected_names)} photos now in gallery")
             result_message = f"Switched to {len(selected_names)} photos"
             
@@ -783,6 +1268,9 @@ class PhotoScheduler:
         except (IOError, OSError) as e:
             self.logger.error(f"File operation error: {e}")
             result_message = f"Error: {str(e)}"
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error: {e}")
+            result_message = f"Error: {str(e)}"
         finally:
             self.root.after(0, lambda msg=result_message: self.end_operation(msg))
             self.operation_lock.release()
@@ -790,50 +1278,61 @@ class PhotoScheduler:
     def _consolidate_gallery_to_library(self, gallery_path, library_path):
         """Move all photos from Gallery back to Library for fresh selection.
         
-        Returns the number of photos moved.
+        Returns the moved photos as (new_path, None) pairs, matching the
+        (path, entry) form used by _date_photos.
         """
-        moved_count = 0
+        moved = []
+        library_dir = os.fspath(library_path)
         for photo in self.iter_photos(gallery_path):
             if self.operation_cancelled.is_set():
                 break
-            new_path = library_path / photo.name
             try:
-                try:
-                    photo.rename(new_path)
-                    moved_count += 1
-                except FileExistsError:
-                    # Duplicate exists in library, just delete from Gallery
-                    photo.unlink()
+                if self._move_photo(photo, library_dir):
+                    moved.append((library_path / photo.name, None))
+                else:
+                    # Duplicate exists in library, deleted from Gallery
                     self.logger.debug(f"Deleted gallery duplicate during consolidation: {photo.name}")
             except PermissionError as e:
                 self.logger.error(f"Permission denied moving {photo}: {e}")
             except (IOError, OSError) as e:
                 self.logger.error(f"Error moving {photo}: {e}")
-        return moved_count
+        return moved
     
     def _move_photos_to_gallery(self, selected_photos, gallery_path):
         """Move selected photos to gallery, handling duplicates"""
-        moved_count = 0
-        for photo in selected_photos:
+        gallery_dir = os.fspath(gallery_path)
+        
+        def move_one(photo):
+            """Return (moved, viewed_name); viewed_name is None if nothing happened"""
             if self.operation_cancelled.is_set():
-                break
-            new_path = gallery_path / photo.name
+                return False, None
             try:
-                # Use atomic rename, handle FileExistsError (TOCTOU fix)
-                try:
-                    photo.rename(new_path)
-                    moved_count += 1
-                except FileExistsError:
-                    # Photo already in Gallery (duplicate in library)
-                    photo.unlink()
-                    self.logger.debug(f"Deleted library duplicate: {photo.name}")
-                
-                with self.viewed_photos_lock:
-                    self.viewed_photos.add(photo.name)
+                if self._move_photo(photo, gallery_dir):
+                    return True, photo.name
+                # Photo already in Gallery (duplicate in library)
+                self.logger.debug(f"Deleted library duplicate: {photo.name}")
+                return False, photo.name
             except PermissionError as e:
                 self.logger.error(f"Permission denied moving {photo}: {e}")
             except (IOError, OSError) as e:
                 self.logger.error(f"Error moving {photo}: {e}")
+            return False, None
+        
+        # Move the first photo alone so a missing hard-link capability is
+        # recorded in no_link_dirs once, not probed by every worker at start
+        results = [move_one(photo) for photo in selected_photos[:1]]
+        
+        # Overlap rename round-trips, which dominate on USB storage
+        with ThreadPoolExecutor(max_workers=MOVE_WORKERS) as executor:
+            results += executor.map(move_one, selected_photos[1:])
+        
+        moved_count = sum(1 for moved, _ in results if moved)
+        try:
+            with self.viewed_photos_lock:
+                self.viewed_photos.update(name for _, name in results if name is not None)
+        except sqlite3.Error as e:
+            # Photos are already moved - keep going, they just stay unmarked
+            self.logger.error(f"Error recording viewed photos: {e}")
         
         self.logger.info(f"Moved {moved_count} new photos to gallery")
         return moved_count
@@ -842,20 +1341,17 @@ class PhotoScheduler:
         """Remove photos from gallery that aren't in selection"""
         removed_count = 0
         deleted_dupes = []
+        library_dir = os.fspath(library_path)
         
         for photo in gallery_photos:
             if self.operation_cancelled.is_set():
                 break
             if photo.name not in selected_names:
-                new_path = library_path / photo.name
                 try:
-                    # Use atomic rename, handle FileExistsError (TOCTOU fix)
-                    try:
-                        photo.rename(new_path)
+                    if self._move_photo(photo, library_dir):
                         removed_count += 1
-                    except FileExistsError:
-                        # Duplicate exists in library, just delete from Gallery
-                        photo.unlink()
+                    else:
+                        # Duplicate exists in library, deleted from Gallery
                         deleted_dupes.append(photo.name)
                 except PermissionError as e:
                     self.logger.error(f"Permission denied removing {photo}: {e}")
@@ -864,6 +1360,47 @@ class PhotoScheduler:
         
         return removed_count, deleted_dupes
     
+    def _move_photo(self, photo, dest_dir):
+        """Move photo into dest_dir (a str path) without replacing an existing file.
+        
+        Returns True if moved, or False if dest_dir already had a photo with
+        the same name and this duplicate was deleted instead.
+        
+        os.rename silently replaces the destination on POSIX, so the move is
+        a hard link (which fails atomically if the name exists) plus unlink.
+        Filesystems without hard links (e.g. FAT/exFAT) fall back to an
+        existence check before renaming, which is not atomic. Such
+        directories are remembered in no_link_dirs so the link is only
+        attempted once.
+        """
+        src = os.fspath(photo)
+        dst = os.path.join(dest_dir, photo.name)
+        if dest_dir not in self.no_link_dirs:
+            try:
+                os.link(src, dst)
+            except FileExistsError:
+                os.unlink(src)
+                return False
+            except OSError as e:
+                if e.errno not in (errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EINVAL):
+                    raise
+                # No hard link support on this filesystem
+                self.no_link_dirs.add(dest_dir)
+            else:
+                os.unlink(src)
+                return True
+        
+        if os.path.lexists(dst):
+            os.unlink(src)
+            return False
+        try:
+            os.rename(src, dst)
+        except FileExistsError:
+            # Windows rename refuses to replace, so it can still race here
+            os.unlink(src)
+            return False
+        return True
+    
     def clear_gallery_async(self):
         if not self.operation_lock.acquire(blocking=False):
             self.logger.warning("Operation already in progress")
@@ -900,18 +1437,15 @@ class PhotoScheduler:
             
             count = 0
             deleted_dupes = []
+            library_dir = os.fspath(library_path)
             
             for photo in self.iter_photos(gallery_path):
                 if self.operation_cancelled.is_set():
                     return
-                new_path = library_path / photo.name
                 try:
-                    # Use atomic rename, handle FileExistsError (TOCTOU fix)
-                    try:
-                        photo.rename(new_path)
+                    if self._move_photo(photo, library_dir):
                         count += 1
-                    except FileExistsError:
-                        photo.unlink()
+                    else:
                         deleted_dupes.append(photo.name)
                 except PermissionError as e:
                     self.logger.error(f"Permission denied moving {photo}: {e}")
@@ -922,7 +1456,6 @@ class PhotoScheduler:
                 with self.viewed_photos_lock:
                     for filename in deleted_dupes:
                         self.viewed_photos.discard(filename)
-                self.save_viewed_photos()
                 self.logger.info(f"Removed {len(deleted_dupes)} duplicate(s)")
             
             self.logger.info(f"Clear complete: moved {count} photos back")
@@ -930,6 +1463,9 @@ class PhotoScheduler:
         except (IOError, OSError) as e:
             self.logger.error(f"Error clearing gallery: {e}")
             result_message = f"Error: {str(e)}"
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error: {e}")
+            result_message = f"Error: {str(e)}"
         finally:
             self.root.after(0, lambda msg=result_message: self.end_operation(msg))
             self.operation_lock.release()
@@ -939,9 +1475,12 @@ class PhotoScheduler:
             messagebox.showwarning("Operation in Progress", "Cannot reset during operation")
             return
         
-        with self.viewed_photos_lock:
-            self.viewed_photos.clear()
-        self.save_viewed_photos()
+        try:
+            with self.viewed_photos_lock:
+                self.viewed_photos.clear()
+        except sqlite3.Error as e:
+            self.logger.error(f"Error resetting view history: {e}")
+            return
         
         # Prune stale cache entries (keeps valid metadata, removes deleted photos)
         self.prune_metadata_cache()
@@ -964,15 +1503,21 @@ class PhotoScheduler:
         self.update_next_switch()
     
     def periodic_update(self):
-        self.check_scheduled_switches()
+        # Switches fire from the one-shot timer; this only keeps the label
+        # and timer current if the clock or date changes underneath them
         self.update_next_switch()
-        self.root.after(60000, self.periodic_update)
+        self.root.after(SCHEDULE_REFRESH_MS, self.periodic_update)
     
     def on_closing(self):
         self.operation_cancelled.set()
         if self.current_thread and self.current_thread.is_alive():
             self.current_thread.join(timeout=THREAD_JOIN_TIMEOUT)
         self.save_metadata_cache()  # Save cache on exit
+        # A worker that missed the join timeout may still use the databases;
+        # leave them open for it, the daemon thread ends with the process
+        if not (self.current_thread and self.current_thread.is_alive()):
+            self.metadata_cache.close()
+            self.viewed_photos.close()
         self.root.destroy()
     
     def run(self):